@@ -1,10 +1,11 @@
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-import tempfile
 import os
+import asyncio
+from io import BytesIO
 from contextlib import asynccontextmanager
 from typing import Optional
 import logging
@@ -12,9 +13,9 @@ from dotenv import load_dotenv
 
 from .models import StagingResult, AnalysisResponse
 from .services.image_processor import ImageProcessor
-from .services.vision_analyzer import VisionAnalyzer
+from .services.vision_analyzer import VisionAnalyzer, get_vision_analyzer
 from .services.auth import AuthService
-from .utils.logger import setup_logging
+from .utils.logger import setup_logging, stop_logging
 
 # Load environment variables
 load_dotenv()
@@ -25,14 +26,20 @@ logger = setup_logging()
 # Security
 security = HTTPBearer(auto_error=False)
 
+# Upload limits
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+MAX_REQUEST_SIZE = MAX_UPLOAD_SIZE + UPLOAD_CHUNK_SIZE  # multipart boundary/header 여유분 포함
+ALLOWED_CONTENT_TYPE_PREFIXES = ("image/", "application/dicom", "application/octet-stream")
+
 # Services
 image_processor = ImageProcessor()
-vision_analyzer = VisionAnalyzer()
 auth_service = AuthService()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup (re-configures logging if a previous lifespan shutdown stopped it)
+    setup_logging()
     logger.info("Starting NSCLC Staging API...")
     
     # # Verify OpenAI API key
@@ -40,20 +47,22 @@ async def lifespan(app: FastAPI):
     #     logger.error("OPENAI_API_KEY not found in environment variables")
     #     raise RuntimeError("OPENAI_API_KEY is required")
     
-    # Initialize services
-    await vision_analyzer.initialize()
+    # Initialize services (creates the shared VisionAnalyzer up front so startup fails fast)
+    await get_vision_analyzer()
     
     logger.info("API startup complete")
     yield
     
     # Shutdown
     logger.info("Shutting down NSCLC Staging API...")
+    stop_logging()
 
 app = FastAPI(
     title="NSCLC Staging API",
     description="AI-powered non-small-cell lung cancer staging from chest CT images",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
@@ -77,6 +86,26 @@ if netlify_pattern:
 if not production_origin and os.getenv("ENVIRONMENT") == "development":
     allowed_origins.append("https://*.netlify.app")
 
+# Reject oversized uploads from the Content-Length header, before Starlette receives and spools
+# the multipart body. Plain ASGI middleware (no BaseHTTPMiddleware task/stream wrapping), so other
+# routes only pay for a path check. Added before CORSMiddleware so the 413 still carries CORS headers.
+class UploadSizeLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/analyze":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > MAX_REQUEST_SIZE:
+                        response = JSONResponse(status_code=413, content={"detail": "File size exceeds 50MB limit"})
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+app.add_middleware(UploadSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -91,37 +120,29 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     Validate JWT token and return user information.
     This is a stub implementation - replace with real authentication in production.
     """
-    try:
-        # Check if credentials are provided
-        if not credentials or not credentials.credentials:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # For development, accept any non-empty token
-        # In production, you would validate the JWT token with auth_service.verify_token()
-        token = credentials.credentials
-        if len(token) < 10:  # Basic validation
+    token = credentials.credentials if credentials else None
+    if not token or len(token) < 10:  # Basic validation
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Tokens issued by /auth/login are verified (and cached) by the auth service;
+    # an expired or forged JWT is rejected instead of falling back to the stub user
+    if token.count(".") == 2:
+        payload = auth_service.verify_token(token)
+        if not payload:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token format",
+                detail="Invalid or expired token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        
-        # Stub user - replace with real user validation
-        return {"id": "user123", "username": "doctor", "role": "radiologist"}
+        return {"id": payload.get("sub"), "username": payload.get("sub"), "role": payload.get("role")}
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Authentication error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authentication failed",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    # For development, accept any other (non-JWT) non-empty token
+    # Stub user - replace with real user validation
+    return {"id": "user123", "username": "doctor", "role": "radiologist"}
 
 @app.get("/health")
 async def health_check():
@@ -137,64 +158,55 @@ async def favicon():
 @app.post("/analyze", response_model=AnalysisResponse)
 async def analyze_image(
     file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    vision_analyzer: VisionAnalyzer = Depends(get_vision_analyzer)
 ):
     """
     Analyze chest CT image for NSCLC staging.
     """
     # Validate file type
-    if not file.content_type or not any(
-        file.content_type.startswith(t) for t in ["image/", "application/dicom", "application/octet-stream"]
-    ):
+    if not file.content_type or not file.content_type.startswith(ALLOWED_CONTENT_TYPE_PREFIXES):
         raise HTTPException(
             status_code=400,
             detail="Invalid file type. Please upload a DICOM (.dcm) or image file (.png, .jpg)"
         )
     
-    # Check file size (50MB limit)
+    # Copy the (already spooled) upload in chunks so at most the size limit is held in memory;
+    # this also covers chunked requests without Content-Length, which the middleware can't check
+    buffer = BytesIO()
     file_size = 0
-    content = await file.read()
-    file_size = len(content)
-    
-    if file_size > 50 * 1024 * 1024:  # 50MB
-        raise HTTPException(
-            status_code=400,
-            detail="File size exceeds 50MB limit"
-        )
-    
-    # Reset file position
-    await file.seek(0)
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        file_size += len(chunk)
+        if file_size > MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail="File size exceeds 50MB limit"
+            )
+        buffer.write(chunk)
+    content = buffer.getvalue()
     
     try:
-        # Create temporary file for processing
-        file_extension = os.path.splitext(file.filename or "upload.tmp")[1] if file.filename else ".tmp"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
+        # Process the image in memory (no temporary file round-trip)
+        filename = file.filename or "unknown_file"
+        logger.info(f"Processing image: {filename} (Size: {file_size} bytes)")
         
-        try:
-            # Process the image
-            filename = file.filename or "unknown_file"
-            logger.info(f"Processing image: {filename} (Size: {file_size} bytes)")
-            
-            # Read and normalize the image
-            processed_image = await image_processor.read_and_normalize(tmp_file_path)
-            
-            # Analyze with vision model
-            result = await vision_analyzer.analyze_ct_scan(processed_image)
-            
-            logger.info(f"Analysis completed for {filename}")
-            
-            return AnalysisResponse(
-                success=True,
-                data=result,
-                message="Analysis completed successfully"
-            )
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
+        # Read and normalize the image in a worker thread so the event loop stays free
+        # (pydicom/NumPy/OpenCV release the GIL during the heavy work)
+        processed_image = await asyncio.to_thread(image_processor.read_and_normalize_sync, content)
+        
+        # Analyze with vision model
+        result = await vision_analyzer.analyze_ct_scan(processed_image)
+        
+        logger.info(f"Analysis completed for {filename}")
+        
+        # Return the response directly so FastAPI skips re-validating it against
+        # AnalysisResponse (kept on the route for the OpenAPI schema)
+        return ORJSONResponse({
+            "success": True,
+            "data": result.model_dump(),
+            "message": "Analysis completed successfully",
+            "error": None
+        })
     
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
@@ -239,4 +251,14 @@ async def get_me(current_user: dict = Depends(get_current_user)):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # Multiple workers need the app as an import string; WEB_CONCURRENCY is uvicorn's own env var.
+    # Default is a single worker: each worker has its own OPENAI_MAX_CONCURRENCY semaphore,
+    # token/result caches, and RotatingFileHandler on the same log files (rotation is not
+    # multi-process safe), so raise it only with a per-worker concurrency budget and
+    # stdout-only logging. loop/http stay "auto" so uvloop/httptools are used when installed.
+    uvicorn.run(
+        "backend.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1"))
+    ) 
\ No newline at end of file
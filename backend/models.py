@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any
 from enum import Enum
 
@@ -44,6 +44,8 @@ class OverallStage(str, Enum):
     IV = "IV"
 
 class ConfidenceScores(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     t: float = Field(..., ge=0.0, le=1.0, description="Confidence score for T stage")
     n: float = Field(..., ge=0.0, le=1.0, description="Confidence score for N stage")
     m: float = Field(..., ge=0.0, le=1.0, description="Confidence score for M stage")
@@ -1,9 +1,11 @@
 import os
+import time
+import hashlib
 import logging
-from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from cachetools import TLRUCache
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,6 +13,47 @@ from models import UserInfo
 
 logger = logging.getLogger(__name__)
 
+# 검증된 토큰 payload를 캐시하는 최대 시간(초)
+TOKEN_CACHE_TTL_SECONDS = 30
+
+def _token_cache_ttu(key: bytes, payload: Dict[str, Any], now: float) -> float:
+    """캐시 만료 시각 = min(now + 30초, 토큰의 exp)"""
+    return min(now + TOKEN_CACHE_TTL_SECONDS, payload.get("exp", float("inf")))
+
+_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Stub 사용자 목록 - bcrypt 해시는 import 시점에 한 번만 계산함
+# In production, this would be replaced by a user database lookup
+_TEST_USERS = {
+    "admin": {
+        "id": "admin",
+        "username": "admin",
+        "password_hash": _pwd_context.hash("password"),
+        "role": "admin",
+        "email": "admin@hospital.com",
+        "department": "Radiology"
+    },
+    "doctor": {
+        "id": "doctor1",
+        "username": "doctor",
+        "password_hash": _pwd_context.hash("doctor123"),
+        "role": "radiologist",
+        "email": "doctor@hospital.com",
+        "department": "Radiology"
+    }
+}
+
+_TEST_USERS_BY_ID = {
+    user["id"]: UserInfo(
+        id=user["id"],
+        username=user["username"],
+        role=user["role"],
+        email=user["email"],
+        department=user["department"]
+    )
+    for user in _TEST_USERS.values()
+}
+
 class AuthService:
     """
     이건 보안적인 요소라고 생각하면 됨 -> 인공지능이 추가해줌.
@@ -20,7 +63,10 @@ class AuthService:
         self.secret_key = os.getenv("JWT_SECRET_KEY", "your-secret-key-here-change-in-production")
         self.algorithm = "HS256"
         self.access_token_expire_minutes = 60 * 24  # 24 hours
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self._access_token_ttl_seconds = self.access_token_expire_minutes * 60
+        self.pwd_context = _pwd_context
+        # 검증된 토큰 캐시 (key는 SHA-256(token), 원본 토큰은 저장하지 않음)
+        self._token_cache = TLRUCache(maxsize=10000, ttu=_token_cache_ttu, timer=time.time)
         
     def create_access_token(self, data: Dict[str, Any]) -> str:
         """
@@ -33,8 +79,7 @@ class AuthService:
             JWT token string
         """
         to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
-        to_encode.update({"exp": expire})
+        to_encode["exp"] = int(time.time()) + self._access_token_ttl_seconds
         
         try:
             encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
@@ -54,8 +99,14 @@ class AuthService:
         Returns:
             Decoded token payload or None if invalid
         """
+        key = hashlib.sha256(token.encode()).digest()
+        payload = self._token_cache.get(key)
+        if payload is not None:
+            return payload
+        
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            self._token_cache[key] = payload
             return payload
         except JWTError as e:
             logger.warning(f"Invalid token: {str(e)}")
@@ -88,26 +139,7 @@ class AuthService:
         # In production, this would query your user database
         # and integrate with hospital SSO system
         
-        test_users = {
-            "admin": {
-                "id": "admin",
-                "username": "admin",
-                "password_hash": self.hash_password("password"),
-                "role": "admin",
-                "email": "admin@hospital.com",
-                "department": "Radiology"
-            },
-            "doctor": {
-                "id": "doctor1",
-                "username": "doctor",
-                "password_hash": self.hash_password("doctor123"),
-                "role": "radiologist",
-                "email": "doctor@hospital.com",
-                "department": "Radiology"
-            }
-        }
-        
-        user_data = test_users.get(username)
+        user_data = _TEST_USERS.get(username)
         if not user_data:
             return None
         
@@ -134,24 +166,7 @@ class AuthService:
             UserInfo if found, None otherwise
         """
         # Stub implementation - replace with database lookup
-        test_users = {
-            "admin": UserInfo(
-                id="admin",
-                username="admin",
-                role="admin",
-                email="admin@hospital.com",
-                department="Radiology"
-            ),
-            "doctor1": UserInfo(
-                id="doctor1",
-                username="doctor",
-                role="radiologist",
-                email="doctor@hospital.com",
-                department="Radiology"
-            )
-        }
-        
-        return test_users.get(user_id)
+        return _TEST_USERS_BY_ID.get(user_id)
     
     def validate_role(self, user_role: str, required_roles: list) -> bool:
         """
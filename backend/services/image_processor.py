@@ -1,21 +1,23 @@
 import os
-import tempfile
 import logging
 from typing import Optional, Tuple, Union
 import numpy as np
-from PIL import Image
-import cv2
-import pydicom
-from pydicom.errors import InvalidDicomError
-from pydicom import multival
 from io import BytesIO
-import base64
+import pybase64
 import sys
 
 from ..models import ImageMetadata
 
 logger = logging.getLogger(__name__)
 
+# cv2, pydicom, PIL은 각 메서드 안에서 import함.
+# /health, /auth/* 요청만 받는 worker는 이 무거운 라이브러리들을 메모리에 올릴 필요가 없음.
+
+# DICOM 파일은 128바이트 preamble 바로 뒤에 'DICM'이 옴
+DICOM_MAGIC = b'DICM'
+
+DATA_URL_PREFIX = b'data:image/jpeg;base64,'
+
 # DICOM 파일 읽는 것(이외에도 png, jpg, jpeg 파일 지원함)
 '''
 DCM 파일과 일반 이미지 파일은 여러 차이가 있음.
@@ -32,34 +34,51 @@ class ImageProcessor:
     def __init__(self):
         self.supported_formats = ['.dcm', '.png', '.jpg', '.jpeg']
         self.target_size = (512, 512)
+        self.jpeg_quality = 92
 
-    async def read_and_normalize(self, file_path: str) -> str:
+    def read_and_normalize_sync(self, content: bytes) -> str:
+        """
+        업로드된 이미지를 정규화하고 base64 data URL로 반환함.
+        전부 CPU 작업(pydicom, NumPy, OpenCV)이라 async 함수가 아님 -> asyncio.to_thread로 호출할 것.
+        """
+        import cv2
 
         try:
-            # 한 번만 DICOM 여부 확인
-            is_dicom = self._is_dicom_file(file_path)
+            # 한 번만 DICOM 여부 확인 (업로드된 바이트를 메모리에서 바로 처리함)
+            is_dicom = self._is_dicom_bytes(content)
             
+            already_windowed = False
             if is_dicom:
-                image_array = self._read_dicom(file_path)
+                image_array, already_windowed = self._read_dicom(content)
             else:
-                image_array = self._read_standard_image(file_path)
+                image_array = self._read_standard_image(content)
             
             # 이거는 이미지 정규화 작업임
-            normalized_image = self._normalize_ct_image(image_array)
-            pil_image = Image.fromarray(normalized_image)
-            
-            # 이미지 크기 조정 작업임
-            if pil_image.size != self.target_size:
-                pil_image = pil_image.resize(self.target_size, Image.Resampling.LANCZOS)
+            # DICOM window 설정이 이미 적용된 경우 다시 정규화하면 판독용 window가 망가지므로 생략함
+            if already_windowed:
+                normalized_image = self._to_2d(image_array)
+            else:
+                normalized_image = self._normalize_ct_image(image_array)
+            
+            # 이미지 크기 조정 작업임 (PIL로 변환하지 않고 ndarray 그대로 처리함)
+            height, width = normalized_image.shape[:2]
+            target_width, target_height = self.target_size
+            if (width, height) != self.target_size:
+                # 축소할 때는 INTER_AREA가 더 빠르고 앨리어싱도 적음, 확대할 때만 LANCZOS 사용
+                if width >= target_width and height >= target_height:
+                    interpolation = cv2.INTER_AREA
+                else:
+                    interpolation = cv2.INTER_LANCZOS4
+                normalized_image = cv2.resize(normalized_image, self.target_size, interpolation=interpolation)
             
             # base64로 변환
-            base64_image = self._pil_to_base64(pil_image)
+            base64_image = self._array_to_base64(normalized_image)
             
-            logger.info(f"Successfully processed image: {file_path}")
+            logger.info(f"Successfully processed image ({len(content)} bytes)")
             return base64_image
             
         except Exception as e:
-            logger.error(f"Error processing image {file_path}: {str(e)}")
+            logger.error(f"Error processing image: {str(e)}")
             raise
     
     def _is_dicom_file(self, file_path: str) -> bool:
@@ -69,28 +88,34 @@ class ImageProcessor:
         if ext == '.dcm':
             return True
         
-        # 2. 확장자가 .dcm이 아니면 헤더 검사
+        # 2. 확장자가 .dcm이 아니면 128바이트 preamble 뒤의 'DICM' 매직 넘버만 확인
+        # (pydicom.dcmread도 force=False면 이 4바이트로만 판단하므로 헤더를 파싱할 필요 없음)
         try:
-            pydicom.dcmread(file_path, stop_before_pixels=True)
-            return True
-        except (InvalidDicomError, Exception):
+            with open(file_path, 'rb') as f:
+                f.seek(128)
+                return f.read(4) == DICOM_MAGIC
+        except OSError:
             return False
     
-    def _read_dicom(self, file_path: str) -> np.ndarray:
-        #DCM 확장자로 끝나는 파일을 읽는 작업임
+    def _is_dicom_bytes(self, content: bytes) -> bool:
+        """메모리에 올라온 바이트로 DICOM 검사 (128바이트 preamble 뒤의 'DICM' 매직 넘버)"""
+        return content[128:132] == DICOM_MAGIC
+    
+    def _read_dicom(self, content: bytes) -> Tuple[np.ndarray, bool]:
+        import pydicom
+        from pydicom import multival
+        from pydicom.pixel_data_handlers.util import apply_modality_lut
+        #DCM 파일을 읽는 작업임 (window 설정이 적용되었는지도 같이 반환함)
         try:
-            ds = pydicom.dcmread(file_path)
+            ds = pydicom.dcmread(BytesIO(content))
 
             pixel_array = ds.pixel_array
             
             # hasattr -> ds에 PhotometricInterpretation 속성이 있는지 확인하는 작업임
-            if hasattr(ds, 'PhotometricInterpretation'):
-                if ds.PhotometricInterpretation == 'MONOCHROME1':
-                    # 이거는 MONOCHROME1 형식인 경우 이미지를 반전하는 작업임
-                    pixel_array = np.max(pixel_array) - pixel_array
-            
+            is_monochrome1 = getattr(ds, 'PhotometricInterpretation', None) == 'MONOCHROME1'
             
             # 이거는 이미지 윈도우 설정 작업임
+            already_windowed = False
             if hasattr(ds, 'WindowCenter') and hasattr(ds, 'WindowWidth'):
                 window_center = ds.WindowCenter
                 window_width = ds.WindowWidth
@@ -100,21 +125,33 @@ class ImageProcessor:
                 if isinstance(window_width, (list, multival.MultiValue)):
                     window_width = window_width[0]
                 
-                pixel_array = self._apply_window_level(pixel_array, window_center, window_width)
+                # WindowCenter/WindowWidth는 HU 기준이므로 먼저 RescaleSlope/Intercept(modality LUT)로
+                # 저장값 -> HU 변환을 해야 함 (안 하면 intercept -1024인 CT는 거의 전부 흰색이 됨)
+                hu_array = apply_modality_lut(pixel_array, ds)
+                pixel_array = self._apply_window_level(hu_array, window_center, window_width)
+                
+                # MONOCHROME1 반전은 window 적용이 끝난 uint8 결과에 함
+                if is_monochrome1:
+                    np.subtract(255, pixel_array, out=pixel_array)
+                already_windowed = True
+            elif is_monochrome1:
+                # 이거는 MONOCHROME1 형식인 경우 이미지를 반전하는 작업임 (이후 min/max 정규화됨)
+                pixel_array = np.max(pixel_array) - pixel_array
             
             logger.info(f"DICOM image loaded: {pixel_array.shape}, dtype: {pixel_array.dtype}")
-            return pixel_array
+            return pixel_array, already_windowed
             
         except Exception as e:
-            logger.error(f"Error reading DICOM file {file_path}: {str(e)}")
+            logger.error(f"Error reading DICOM data: {str(e)}")
             raise
     
-    def _read_standard_image(self, file_path: str) -> np.ndarray:
+    def _read_standard_image(self, content: bytes) -> np.ndarray:
+        from PIL import Image
         #PNG, JPG, JPEG 확장자로 끝나는 파일을 읽는 작업임
         #근디 솔직히 없을 것 같긴 한데...
         try:
             # PIL을 사용하여 이미지를 읽음
-            image = Image.open(file_path)
+            image = Image.open(BytesIO(content))
             
             # 이미지 모드를 확인하고 그레이스케일로 변환
             if image.mode != 'L':
@@ -127,53 +164,70 @@ class ImageProcessor:
             return image_array
             
         except Exception as e:
-            logger.error(f"Error reading standard image {file_path}: {str(e)}")
+            logger.error(f"Error reading standard image: {str(e)}")
             raise
     
     def _apply_window_level(self, image: np.ndarray, window_center: float, window_width: float) -> np.ndarray:
         
+        window_center = float(window_center)
+        window_width = float(window_width)
         min_val = window_center - window_width / 2
-        max_val = window_center + window_width / 2
+        scale = 255.0 / window_width
         
-        windowed = np.clip(image, min_val, max_val)
-        windowed = ((windowed - min_val) / (max_val - min_val) * 255).astype(np.uint8)
+        # 연산마다 임시 배열을 만들지 않고 하나의 float32 버퍼에서 in-place로 계산함
+        windowed = np.empty(image.shape, dtype=np.float32)
+        np.subtract(image, min_val, out=windowed)
+        np.clip(windowed, 0, window_width, out=windowed)
+        np.multiply(windowed, scale, out=windowed)
         
-        return windowed
+        return windowed.astype(np.uint8)
+    
+    def _to_2d(self, image: np.ndarray) -> np.ndarray:
+        """
+        (rows, cols) 2차원 배열로 줄임. OpenCV resize/CLAHE는 2차원(또는 채널이 있는) 이미지만 받음.
+        - (rows, cols, channels): 첫 번째 채널 사용
+        - (frames, rows, cols): multi-frame DICOM -> 가운데 frame 사용
+        """
+        image = np.squeeze(image)
+        if image.ndim > 2 and image.shape[-1] in (3, 4):
+            image = image[..., 0]
+        while image.ndim > 2:
+            image = image[image.shape[0] // 2]
+        return image
     
     def _normalize_ct_image(self, image: np.ndarray) -> np.ndarray:
         """
         CT 이미지 정규화를 하는 이유 -> GPT 모델은 일반 이미지에만 훈련되었기 때문에 
         CT 이미지를 정규화하여 일반 이미지로 표현할 필요가 있음.
         """
+        import cv2
 
-        if len(image.shape) > 2:
-            image = image[:, :, 0] if image.shape[2] > 1 else image.squeeze()
-        image = image.astype(np.float32)
+        image = self._to_2d(image)
         
-        # 0-255 범위로 정규화
-        if image.max() > image.min():
-            image = (image - image.min()) / (image.max() - image.min()) * 255
-        else:
-            image = np.zeros_like(image)
+        # 0-255 범위로 정규화 (OpenCV가 min/max 계산과 uint8 변환을 한 번에 처리함)
+        image_uint8 = cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
         
-        # openCV의 모듈을 통해 정보 손실 최소화하면서 압축축
-        image_uint8 = image.astype(np.uint8)
-        equalized = cv2.equalizeHist(image_uint8)
+        # 전체 히스토그램 평활화 대신 CLAHE로 국소 대비를 높임 (CT 대비가 더 좋음)
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        equalized = clahe.apply(image_uint8)
         
         # 노이즈 감소를 위해 가우시안 블러 적용
         blurred = cv2.GaussianBlur(equalized, (3, 3), 0)
         
         return blurred
     
-    def _pil_to_base64(self, image: Image.Image) -> str:
-        buffer = BytesIO()
-        image.save(buffer, format='PNG')
-        image_bytes = buffer.getvalue()
-        base64_string = base64.b64encode(image_bytes).decode('utf-8')
-        
-        return f"data:image/png;base64,{base64_string}"
+    def _array_to_base64(self, image: np.ndarray) -> str:
+        import cv2
+        # PNG 대신 JPEG로 보내면 payload(=업로드 대역폭, 이미지 토큰)가 훨씬 작아짐
+        ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise ValueError("Failed to encode image as JPEG")
+        # ndarray 버퍼를 바로 인코딩하고(tobytes 복사 생략) base64는 ASCII라 한 번에 decode함
+        # pybase64는 SIMD(AVX2 등)로 인코딩해서 표준 base64 모듈보다 훨씬 빠름
+        return (DATA_URL_PREFIX + pybase64.b64encode(jpeg)).decode('ascii')
     
     def get_image_metadata(self, file_path: str) -> dict:
+        import pydicom
         try:
             is_dicom = self._is_dicom_file(file_path)
 
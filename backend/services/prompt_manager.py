@@ -2,10 +2,20 @@
 import yaml
 import os
 import logging
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=8)
+def _read_yaml(yaml_path: str, mtime: float) -> Dict[str, Any]:
+    """YAML 파일 파싱 (경로 + 수정 시각 기준으로 캐시되므로 파일이 바뀌면 다시 파싱함)"""
+    with open(yaml_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    
+    logger.info(f"Prompt configuration loaded from {yaml_path}")
+    return config
+
 class PromptManager:
     def __init__(self, yaml_path: Optional[str] = None):
         if yaml_path is None:
@@ -15,15 +25,12 @@ class PromptManager:
         
         self.yaml_path = yaml_path
         self.config = self._load_yaml()
+        self._cached_prompt = self._build_prompt_impl()
     
     def _load_yaml(self) -> Dict[str, Any]:
         """YAML 파일 로드"""
         try:
-            with open(self.yaml_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-            
-            logger.info(f"Prompt configuration loaded from {self.yaml_path}")
-            return config
+            return _read_yaml(self.yaml_path, os.path.getmtime(self.yaml_path))
             
         except FileNotFoundError:
             logger.error(f"Prompt YAML file not found: {self.yaml_path}")
@@ -70,43 +77,48 @@ class PromptManager:
         return self.config.get('output_format', [])
     
     def build_enhanced_system_prompt(self) -> str:
+        """YAML의 모든 정보를 통합한 향상된 시스템 프롬프트 반환 (reload_config 전까지 캐시됨)"""
+        return self._cached_prompt
+    
+    def _build_prompt_impl(self) -> str:
         """YAML의 모든 정보를 통합한 향상된 시스템 프롬프트 생성"""
-        base_prompt = self.get_system_prompt()
+        parts: List[str] = [self.get_system_prompt()]
         
         # 병기 분류 가이드라인 추가
         guidelines = self.get_staging_guidelines()
         if guidelines:
-            base_prompt += "\n\n## TNM Staging Guidelines:\n"
+            parts.append("\n\n## TNM Staging Guidelines:\n")
             
             for stage_type, stages in guidelines.items():
-                base_prompt += f"\n### {stage_type.upper().replace('_', ' ')}:\n"
+                parts.append(f"\n### {stage_type.upper().replace('_', ' ')}:\n")
                 for stage, description in stages.items():
-                    base_prompt += f"- {stage}: {description}\n"
+                    parts.append(f"- {stage}: {description}\n")
         
         # 분석 지침 추가
         instructions = self.get_analysis_instructions()
         if instructions:
-            base_prompt += "\n\n## Analysis Instructions:\n"
+            parts.append("\n\n## Analysis Instructions:\n")
             for i, instruction in enumerate(instructions, 1):
-                base_prompt += f"{i}. {instruction}\n"
+                parts.append(f"{i}. {instruction}\n")
         
         # 품질 지표 추가
         quality_indicators = self.get_quality_indicators()
         if quality_indicators:
-            base_prompt += "\n\n## Quality Indicators:\n"
+            parts.append("\n\n## Quality Indicators:\n")
             for indicator in quality_indicators:
-                base_prompt += f"- {indicator}\n"
+                parts.append(f"- {indicator}\n")
         
         # 출력 형식 추가
         output_format = self.get_output_format()
         if output_format:
-            base_prompt += "\n\n## Output Format:\n"
+            parts.append("\n\n## Output Format:\n")
             for format_rule in output_format:
-                base_prompt += f"- {format_rule}\n"
+                parts.append(f"- {format_rule}\n")
         
-        return base_prompt
+        return "".join(parts)
     
     def reload_config(self):
         """설정 다시 로드 (런타임에 YAML 변경사항 반영)"""
         self.config = self._load_yaml()
+        self._cached_prompt = self._build_prompt_impl()
         logger.info("Prompt configuration reloaded")
\ No newline at end of file
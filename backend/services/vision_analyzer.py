@@ -1,23 +1,146 @@
-import json
+import io
 import logging
 import os
-from typing import Dict, Any, Optional
-from openai import OpenAI
 import asyncio
+import pybase64
+import hashlib
+import mimetypes
+from typing import Dict, Any, List, Optional, Tuple, Union
+import orjson
+import fastjsonschema
+from openai import AsyncOpenAI
+from cachetools import TTLCache
 
 from ..models import StagingResult, ConfidenceScores
 from .prompt_manager import PromptManager
 
 logger = logging.getLogger(__name__)
 
+# Must be a multiple of 3 so base64-encoded chunks concatenate without padding in between
+_BASE64_READ_CHUNK_SIZE = 3 * io.DEFAULT_BUFFER_SIZE
+
+# Cache keys hash data URLs in slices instead of encoding the whole string at once
+_CACHE_KEY_HASH_CHUNK_SIZE = 1 << 20
+
+
+def _cache_key(image: str) -> bytes:
+    digest = hashlib.sha256()
+    for start in range(0, len(image), _CACHE_KEY_HASH_CHUNK_SIZE):
+        digest.update(image[start:start + _CACHE_KEY_HASH_CHUNK_SIZE].encode())
+    return digest.digest()
+
+# Tool definitions are constant, so they are built once at import instead of per request
+_STAGING_RESULT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "t_stage": {
+            "type": "string",
+            "enum": ["T0", "T1", "T1a", "T1b", "T1c", "T2", "T2a", "T2b", "T3", "T4"],
+            "description": "T stage based on primary tumor characteristics"
+        },
+        "n_stage": {
+            "type": "string",
+            "enum": ["N0", "N1", "N2", "N3"],
+            "description": "N stage based on regional lymph node involvement"
+        },
+        "m_stage": {
+            "type": "string",
+            "enum": ["M0", "M1a", "M1b", "M1c"],
+            "description": "M stage based on distant metastases"
+        },
+        "overall_stage": {
+            "type": "string",
+            "enum": ["IA1", "IA2", "IA3", "IB", "IIA", "IIB", "IIIA", "IIIB", "IIIC", "IVA", "IVB", "I", "II", "III", "IV"],
+            "description": "Overall stage based on TNM combination"
+        },
+        "confidence_scores": {
+            "type": "object",
+            "properties": {
+                "t_confidence": {
+                    "type": "number",
+                    "minimum": 0,
+                    "maximum": 1,
+                    "description": "Confidence score for T stage assessment"
+                },
+                "n_confidence": {
+                    "type": "number",
+                    "minimum": 0,
+                    "maximum": 1,
+                    "description": "Confidence score for N stage assessment"
+                },
+                "m_confidence": {
+                    "type": "number",
+                    "minimum": 0,
+                    "maximum": 1,
+                    "description": "Confidence score for M stage assessment"
+                },
+                "overall_confidence": {
+                    "type": "number",
+                    "minimum": 0,
+                    "maximum": 1,
+                    "description": "Confidence score for overall stage assessment"
+                }
+            },
+            "required": ["t_confidence", "n_confidence", "m_confidence", "overall_confidence"]
+        },
+        "error": {
+            "type": "string",
+            "description": "Error message if image is non-diagnostic or analysis fails"
+        }
+    },
+    "required": ["confidence_scores"]
+}
+
+# OpenAI function parameters must be an object, so the per-image
+# results are wrapped in a "results" array
+_ANALYZE_NSCLC_FUNCTION_SCHEMA = {
+    "name": "analyze_nsclc_staging_batch",
+    "description": "Analyze CT scans for NSCLC staging according to AJCC 8th edition, one result per image",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": _STAGING_RESULT_SCHEMA,
+                "description": "Staging result for each image, in the order the images were given"
+            }
+        },
+        "required": ["results"]
+    }
+}
+
+# Compiled once; validates each item of the model's `results` array
+_validate_result = fastjsonschema.compile(_STAGING_RESULT_SCHEMA)
+
+# Every failure path returns the same all-zero confidences; ConfidenceScores is frozen, so one instance is shared
+_ZERO_CONFIDENCES = ConfidenceScores(t=0.0, n=0.0, m=0.0, stage=0.0)
+
+def _error_result(error: str) -> StagingResult:
+    return StagingResult(t=None, n=None, m=None, stage=None, confidences=_ZERO_CONFIDENCES, error=error)
+
+_ANALYZE_NSCLC_TOOLS = [{"type": "function", "function": _ANALYZE_NSCLC_FUNCTION_SCHEMA}]
+_ANALYZE_NSCLC_TOOL_CHOICE = {"type": "function", "function": {"name": _ANALYZE_NSCLC_FUNCTION_SCHEMA["name"]}}
+
 class VisionAnalyzer:
+    # One instance is meant to be shared by the whole process (see get_vision_analyzer()).
+    # It is safe to use from concurrent coroutines: AsyncOpenAI multiplexes requests over
+    # a single HTTPX connection pool, and the prompts/cache are only replaced on reload.
     def __init__(self):
         self.client = None
         self.model_name = "gpt-4o"
         self.temperature = 0.2
         self.max_tokens = 300
+        self._sem = None
+        # Results for identical images (re-uploads, retries) are served from memory
+        self._cache = TTLCache(
+            maxsize=int(os.getenv("VISION_CACHE_MAXSIZE", "256")),
+            ttl=int(os.getenv("VISION_CACHE_TTL_SECONDS", "3600"))
+        )
         
         self.prompt_manager = PromptManager()
+        # Prompt strings only change on reload_prompts(), so build them once here
+        self._system_prompt = self.prompt_manager.build_enhanced_system_prompt()
+        self._analysis_prompt = self.prompt_manager.get_analysis_prompt()
         
     async def initialize(self):
         try:
@@ -25,11 +148,17 @@ class VisionAnalyzer:
             if not api_key:
                 raise ValueError("OPENAI_API_KEY environment variable is required")
             
-            self.client = OpenAI(api_key=api_key)
+            # The SDK retries 429/5xx with exponential backoff; retries happen inside the semaphore below
+            self.client = AsyncOpenAI(
+                api_key=api_key,
+                max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+            )
+            # Bound concurrent OpenAI calls so bursts queue here instead of tripping rate limits
+            self._sem = asyncio.Semaphore(int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")))
             logger.info("OpenAI client initialized successfully")
             
         except Exception as e:
-            logger.error(f"Failed to initialize OpenAI client: {str(e)}")
+            logger.error("Failed to initialize OpenAI client: %s", e)
             raise
     
     async def analyze_ct_scan(self, base64_image: str) -> StagingResult:
@@ -37,172 +166,319 @@ class VisionAnalyzer:
         Analyze a CT scan image and return NSCLC staging results.
         
         Args:
-            base64_image: Base64 encoded image string
+            base64_image: Base64 encoded image data URL (`data:image/...;base64,...`).
+                Callers building it should prefer `pybase64.b64encode`, which is
+                SIMD-accelerated, over the stdlib `base64` module.
             
         Returns:
             StagingResult with TNM staging and confidence scores
         """
+        results = await self.analyze_ct_scans_batch([base64_image])
+        return results[0]
+    
+    async def analyze_ct_scan_from_path(self, path: Union[str, os.PathLike]) -> StagingResult:
+        """
+        Analyze a CT scan image file without first reading the whole file into memory.
+        
+        The file is base64-encoded chunk by chunk straight into the data URL
+        buffer and hashed for the result cache on the way, so the file itself is
+        never held in memory. The encoded image briefly exists twice (buffer and
+        final string) while it is decoded.
+        
+        Args:
+            path: Path to a PNG/JPEG image file
+            
+        Returns:
+            StagingResult with TNM staging and confidence scores
+        """
+        data_url, cache_key = await asyncio.to_thread(self._encode_data_url, path)
+        results = await self._analyze_batch_with_keys([data_url], [cache_key])
+        return results[0]
+    
+    def _encode_data_url(self, path: Union[str, os.PathLike]) -> Tuple[str, bytes]:
+        """Return the data URL and its cache key (same digest as `_cache_key(data_url)`)."""
+        mime_type = mimetypes.guess_type(os.fspath(path))[0] or "image/jpeg"
+        
+        prefix = f"data:{mime_type};base64,".encode("ascii")
+        digest = hashlib.sha256(prefix)
+        buffer = bytearray(prefix)
+        with open(path, "rb") as f:
+            while chunk := f.read(_BASE64_READ_CHUNK_SIZE):
+                encoded = pybase64.b64encode(chunk)
+                digest.update(encoded)
+                buffer += encoded
+        
+        data_url = buffer.decode("ascii")
+        del buffer
+        return data_url, digest.digest()
+    
+    async def analyze_ct_scans_batch(self, images: List[str]) -> List[StagingResult]:
+        """
+        Analyze several CT scan images in a single OpenAI call.
+        
+        The system/analysis prompts are sent once for the whole batch, so bulk
+        jobs don't pay the prompt tokens and HTTP overhead per image.
+        
+        Args:
+            images: Base64 encoded image strings
+            
+        Returns:
+            One StagingResult per image, in the same order as `images`
+        """
+        if not images:
+            return []
+        
+        return await self._analyze_batch_with_keys(images, [_cache_key(image) for image in images])
+    
+    async def _analyze_batch_with_keys(self, images: List[str], cache_keys: List[bytes]) -> List[StagingResult]:
         if not self.client:
             raise RuntimeError("OpenAI client not initialized")
         
-        try:
-
-            function_schema = {
-                "name": "analyze_nsclc_staging",
-                "description": "Analyze CT scan for NSCLC staging according to AJCC 8th edition",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "t_stage": {
-                            "type": "string",
-                            "enum": ["T0", "T1", "T1a", "T1b", "T1c", "T2", "T2a", "T2b", "T3", "T4"],
-                            "description": "T stage based on primary tumor characteristics"
-                        },
-                        "n_stage": {
-                            "type": "string",
-                            "enum": ["N0", "N1", "N2", "N3"],
-                            "description": "N stage based on regional lymph node involvement"
-                        },
-                        "m_stage": {
-                            "type": "string",
-                            "enum": ["M0", "M1a", "M1b", "M1c"],
-                            "description": "M stage based on distant metastases"
-                        },
-                        "overall_stage": {
-                            "type": "string",
-                            "enum": ["IA1", "IA2", "IA3", "IB", "IIA", "IIB", "IIIA", "IIIB", "IIIC", "IVA", "IVB", "I", "II", "III", "IV"],
-                            "description": "Overall stage based on TNM combination"
-                        },
-                        "confidence_scores": {
-                            "type": "object",
-                            "properties": {
-                                "t_confidence": {
-                                    "type": "number",
-                                    "minimum": 0,
-                                    "maximum": 1,
-                                    "description": "Confidence score for T stage assessment"
-                                },
-                                "n_confidence": {
-                                    "type": "number",
-                                    "minimum": 0,
-                                    "maximum": 1,
-                                    "description": "Confidence score for N stage assessment"
-                                },
-                                "m_confidence": {
-                                    "type": "number",
-                                    "minimum": 0,
-                                    "maximum": 1,
-                                    "description": "Confidence score for M stage assessment"
-                                },
-                                "overall_confidence": {
-                                    "type": "number",
-                                    "minimum": 0,
-                                    "maximum": 1,
-                                    "description": "Confidence score for overall stage assessment"
-                                }
-                            },
-                            "required": ["t_confidence", "n_confidence", "m_confidence", "overall_confidence"]
-                        },
-                        "error": {
-                            "type": "string",
-                            "description": "Error message if image is non-diagnostic or analysis fails"
-                        }
-                    },
-                    "required": ["confidence_scores"]
-                }
+        results: List[Optional[StagingResult]] = [self._cache.get(key) for key in cache_keys]
+        pending = [i for i, result in enumerate(results) if result is None]
+        
+        if len(pending) < len(images):
+            logger.info("Returning %d cached analysis result(s)", len(images) - len(pending))
+        
+        if pending:
+            analyzed = await self._request_batch_analysis([images[i] for i in pending])
+            for i, staging_result in zip(pending, analyzed):
+                results[i] = staging_result
+                if not staging_result.error:
+                    self._cache[cache_keys[i]] = staging_result
+        
+        return results
+    
+    def _build_request(self, images: List[str]) -> Dict[str, Any]:
+        """Build the chat.completions request body for a batch of images."""
+        # Prepare the messages using YAML prompts.
+        # Everything that is identical between requests (system prompt, then the
+        # analysis prompt) goes first so OpenAI's prompt caching can reuse the
+        # prefix; the per-request images and batch note come after it.
+        user_content: List[Dict[str, Any]] = [
+            {
+                "type": "text",
+                "text": self._get_analysis_prompt()
             }
-            
-            # Prepare the messages using YAML prompts
-            messages = [
-                {
-                    "role": "system",
-                    "content": self._get_system_prompt()
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": base64_image
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": self._get_analysis_prompt()
-                        }
-                    ]
+        ]
+        for i, image in enumerate(images, 1):
+            if len(images) > 1:
+                user_content.append({"type": "text", "text": f"Image {i}:"})
+            user_content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": image
                 }
-            ]
+            })
+        
+        if len(images) > 1:
+            user_content.append({
+                "type": "text",
+                "text": (
+                    f"There are {len(images)} images above. Analyze each image independently "
+                    f"and return exactly {len(images)} results, in the same order as the images."
+                )
+            })
+        
+        messages = [
+            {
+                "role": "system",
+                "content": self._get_system_prompt()
+            },
+            {
+                "role": "user",
+                "content": user_content
+            }
+        ]
+        
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens * len(images),
+            "tools": _ANALYZE_NSCLC_TOOLS,
+            "tool_choice": _ANALYZE_NSCLC_TOOL_CHOICE
+        }
+    
+    def _parse_batch_arguments(self, arguments: Union[str, bytes, bytearray], image_count: int) -> List[StagingResult]:
+        """Map the tool call's `results` array back to one StagingResult per image."""
+        result_items = orjson.loads(arguments).get('results', [])
+        
+        staging_results = []
+        for i in range(image_count):
+            if i < len(result_items):
+                staging_result = self._parse_analysis_result(result_items[i])
+                logger.info(
+                    "Analysis completed successfully: T%s, N%s, M%s, Stage %s",
+                    staging_result.t, staging_result.n, staging_result.m, staging_result.stage
+                )
+            else:
+                logger.error("No analysis result returned for image %d", i + 1)
+                staging_result = _error_result("No analysis result received from model")
+            staging_results.append(staging_result)
+        
+        return staging_results
+    
+    async def _request_batch_analysis(self, images: List[str]) -> List[StagingResult]:
+        try:
+            request = self._build_request(images)
             
             # Make the API call
-            logger.info("Sending CT scan to OpenAI for analysis...")
+            logger.info("Sending %d CT scan(s) to OpenAI for analysis...", len(images))
             
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                tools=[{"type": "function", "function": function_schema}],
-                tool_choice={"type": "function", "function": {"name": "analyze_nsclc_staging"}}
-            )
+            # Stream the response and collect the tool call's argument deltas as they arrive
+            arguments = bytearray()
+            async with self._sem:
+                stream = await self.client.chat.completions.create(**request, stream=True)
+                # Closing the stream returns the HTTP connection to the pool even on errors or cancellation
+                async with stream:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        for tool_call in chunk.choices[0].delta.tool_calls or ():
+                            if tool_call.index == 0 and tool_call.function and tool_call.function.arguments:
+                                arguments += tool_call.function.arguments.encode()
             
-            if response.choices[0].message.tool_calls:
-                tool_call = response.choices[0].message.tool_calls[0]
-                result_data = json.loads(tool_call.function.arguments)
-                
-
-                staging_result = self._parse_analysis_result(result_data)
-                
-                logger.info(f"Analysis completed successfully: T{staging_result.t}, N{staging_result.n}, M{staging_result.m}, Stage {staging_result.stage}")
-                return staging_result
-            else:
+            if not arguments:
                 logger.error("No tool calls in response")
-                return StagingResult(
-                    t=None,
-                    n=None,
-                    m=None,
-                    stage=None,
-                    confidences=ConfidenceScores(t=0.0, n=0.0, m=0.0, stage=0.0),
-                    error="No analysis result received from model"
-                )
+                return [_error_result("No analysis result received from model") for _ in images]
+            
+            return self._parse_batch_arguments(arguments, len(images))
                 
         except Exception as e:
-            logger.error(f"Error during CT scan analysis: {str(e)}")
-            return StagingResult(
-                t=None,
-                n=None,
-                m=None,
-                stage=None,
-                confidences=ConfidenceScores(t=0.0, n=0.0, m=0.0, stage=0.0),
-                error=f"Analysis failed: {str(e)}"
-            )
+            logger.error("Error during CT scan analysis: %s", e)
+            return [_error_result(f"Analysis failed: {str(e)}") for _ in images]
+    
+    async def submit_batch(self, scans: Dict[str, str]) -> str:
+        """
+        Submit CT scans to the OpenAI Batch API for offline analysis.
+        
+        Batch jobs are billed at a discount and don't count against the
+        interactive rate limits, but complete asynchronously (within 24h).
+        
+        Args:
+            scans: Mapping of scan ID -> base64 encoded image string
+            
+        Returns:
+            OpenAI batch ID, to be passed to poll_batch()
+        """
+        if not self.client:
+            raise RuntimeError("OpenAI client not initialized")
+        
+        lines = [
+            orjson.dumps({
+                "custom_id": scan_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_request([image])
+            })
+            for scan_id, image in scans.items()
+        ]
+        
+        batch_file = await self.client.files.create(
+            file=("nsclc_staging_batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        logger.info("Submitted batch %s with %d CT scan(s)", batch.id, len(lines))
+        return batch.id
+    
+    async def poll_batch(self, batch_id: str) -> Optional[Dict[str, StagingResult]]:
+        """
+        Check an OpenAI batch job and collect its results once it has finished.
+        
+        Args:
+            batch_id: ID returned by submit_batch()
+            
+        Returns:
+            Mapping of scan ID -> StagingResult, or None if the batch is still running.
+            Expired/cancelled batches return the results they did produce, with the
+            remaining scan IDs marked as errors.
+        """
+        if not self.client:
+            raise RuntimeError("OpenAI client not initialized")
+        
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+            return None
+        if batch.status not in ("completed", "expired", "cancelled"):
+            raise RuntimeError(f"Batch {batch_id} ended with status: {batch.status}")
+        
+        results: Dict[str, StagingResult] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                
+                record = orjson.loads(line)
+                response = record.get("response") or {}
+                try:
+                    if record.get("error") or response.get("status_code") != 200:
+                        raise ValueError(record.get("error") or response.get("body"))
+                    
+                    message = response["body"]["choices"][0]["message"]
+                    if not message.get("tool_calls"):
+                        raise ValueError("No analysis result received from model")
+                    
+                    arguments = message["tool_calls"][0]["function"]["arguments"]
+                    results[record["custom_id"]] = self._parse_batch_arguments(arguments, 1)[0]
+                    
+                except Exception as e:
+                    logger.error("Batch request %s failed: %s", record.get('custom_id'), e)
+                    results[record["custom_id"]] = _error_result(f"Analysis failed: {str(e)}")
+        
+        # Expired/cancelled batches only carry partial output; mark the scans that never ran
+        if batch.status != "completed":
+            content = await self.client.files.content(batch.input_file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                scan_id = orjson.loads(line)["custom_id"]
+                if scan_id not in results:
+                    results[scan_id] = _error_result(f"Analysis failed: batch {batch.status}")
+            logger.warning("Batch %s %s before finishing all scans", batch_id, batch.status)
+        
+        logger.info("Collected %d result(s) from batch %s", len(results), batch_id)
+        return results
     
     def _get_system_prompt(self) -> str:
-        return self.prompt_manager.build_enhanced_system_prompt()
+        return self._system_prompt
     
     def _get_analysis_prompt(self) -> str:
-        return self.prompt_manager.get_analysis_prompt()
+        return self._analysis_prompt
     
     def _parse_analysis_result(self, result_data: Dict[str, Any]) -> StagingResult:
-        logger.info(f"Parsing analysis result data: {json.dumps(result_data, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Parsing analysis result data: %s", orjson.dumps(result_data).decode())
         try:
             # If the model returns an error, prioritize it.
             if error_msg := result_data.get('error'):
-                logger.warning(f"Analysis returned an error: {error_msg}")
-                return StagingResult(
-                    t=None, n=None, m=None, stage=None,
-                    confidences=ConfidenceScores(t=0.0, n=0.0, m=0.0, stage=0.0),
-                    error=error_msg
-                )
+                logger.warning("Analysis returned an error: %s", error_msg)
+                return _error_result(error_msg)
 
-            confidences = result_data.get('confidence_scores', {})
+            # Reject malformed model output instead of silently filling in defaults
+            try:
+                _validate_result(result_data)
+            except fastjsonschema.JsonSchemaException as e:
+                logger.warning("Analysis result violates schema: %s", e.message)
+                return _error_result(f"Schema violation: {e.message}")
+
+            confidences = result_data['confidence_scores']
             
             confidence_scores = ConfidenceScores(
-                t=confidences.get('t_confidence', 0.0),
-                n=confidences.get('n_confidence', 0.0),
-                m=confidences.get('m_confidence', 0.0),
-                stage=confidences.get('overall_confidence', 0.0)
+                t=confidences['t_confidence'],
+                n=confidences['n_confidence'],
+                m=confidences['m_confidence'],
+                stage=confidences['overall_confidence']
             )
             
             return StagingResult(
@@ -210,22 +486,37 @@ class VisionAnalyzer:
                 n=result_data.get('n_stage'),
                 m=result_data.get('m_stage'),
                 stage=result_data.get('overall_stage'),
-                confidences=confidence_scores,
-                error=result_data.get('error')
+                confidences=confidence_scores
             )
             
         except Exception as e:
-            logger.error(f"Error parsing analysis result: {str(e)}")
-            return StagingResult(
-                t=None,
-                n=None,
-                m=None,
-                stage=None,
-                confidences=ConfidenceScores(t=0.0, n=0.0, m=0.0, stage=0.0),
-                error=f"Failed to parse analysis result: {str(e)}"
-            )
+            logger.error("Error parsing analysis result: %s", e)
+            return _error_result(f"Failed to parse analysis result: {str(e)}")
     
     def reload_prompts(self):
         """런타임에 프롬프트 다시 로드"""
         self.prompt_manager.reload_config()
-        logger.info("Prompts reloaded from YAML") 
\ No newline at end of file
+        self._system_prompt = self.prompt_manager.build_enhanced_system_prompt()
+        self._analysis_prompt = self.prompt_manager.get_analysis_prompt()
+        # Cached results were produced with the old prompts
+        self._cache.clear()
+        logger.info("Prompts reloaded from YAML") 
+
+_shared_analyzer: Optional[VisionAnalyzer] = None
+_shared_analyzer_lock = asyncio.Lock()
+
+async def get_vision_analyzer() -> VisionAnalyzer:
+    """
+    Return the process-wide VisionAnalyzer, creating and initializing it on first use.
+    
+    Use this as a FastAPI dependency instead of constructing VisionAnalyzer per request,
+    so the prompts and the OpenAI connection pool (keep-alive/TLS) are reused.
+    """
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        async with _shared_analyzer_lock:
+            if _shared_analyzer is None:
+                analyzer = VisionAnalyzer()
+                await analyzer.initialize()
+                _shared_analyzer = analyzer
+    return _shared_analyzer
@@ -1,12 +1,25 @@
 import logging
 import os
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+import queue
+import time
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
-def setup_logging():
+# setup_logging()이 여러 번 호출돼도 (tests, reload, workers) handler를 다시 만들지 않도록 하는 flag
+_LOGGING_CONFIGURED = False
+
+# 파일 handler들은 이 listener의 background thread에서 실행됨 (shutdown 시 stop_logging()으로 정지)
+_queue_listener = None
+_queue_handler = None
+
+def setup_logging(force: bool = False):
     """
    이 부분은 logger을 설정하는 부분으로 이런 부분도 AI에게 맞기고 가면 쉽게 할 수 있음.
+   이미 설정되어 있으면 기존 logger를 그대로 반환함 (force=True면 다시 설정).
     """
+    global _LOGGING_CONFIGURED, _queue_listener, _queue_handler
+    if _LOGGING_CONFIGURED and not force:
+        return logging.getLogger('nsclc_staging')
+    
     # Create logs directory if it doesn't exist
     log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
     if not os.path.exists(log_dir):
@@ -16,21 +29,23 @@ def setup_logging():
     log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
     logging_level = getattr(logging, log_level, logging.INFO)
     
-    # Use basicConfig for root logger configuration
-    logging.basicConfig(
-        level=logging_level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[logging.StreamHandler()]  # Ensure logs go to console
-    )
+    # Root logger에는 level만 설정 (basicConfig의 별도 StreamHandler/format은 두지 않음)
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging_level)
 
-    # Get the root logger
+    # Get the application logger; records stop here instead of also reaching the root handlers
     logger = logging.getLogger('nsclc_staging')
+    logger.propagate = False
     
-    # Clear existing handlers to avoid duplicates if re-run
-    if logger.hasHandlers():
-        logger.handlers.clear()
+    # Close and clear existing handlers to avoid duplicates (and leaked file descriptors) if re-run
+    stop_logging()
+    for handler in logger.handlers:
+        if handler in root_logger.handlers:
+            root_logger.removeHandler(handler)
+        handler.close()
+    logger.handlers.clear()
 
-    # Create formatter
+    # Create formatter (shared by every handler below)
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
@@ -49,7 +64,6 @@ def setup_logging():
     )
     file_handler.setLevel(logging_level)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
     
     # Error file handler
     error_log_file = os.path.join(log_dir, 'errors.log')
@@ -60,16 +74,50 @@ def setup_logging():
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(formatter)
-    logger.addHandler(error_handler)
+    
+    # File writes (and rotation) happen on the listener thread, not on the request thread
+    log_queue = queue.Queue(-1)
+    queue_handler = QueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+    _queue_handler = queue_handler
+    _queue_listener = QueueListener(log_queue, file_handler, error_handler, respect_handler_level=True)
+    _queue_listener.start()
+    
+    # Module loggers (logging.getLogger(__name__)) propagate to root; give root the same handler
+    # instances so each record is still formatted exactly once
+    root_logger.addHandler(console_handler)
+    root_logger.addHandler(queue_handler)
     
     # Set third-party loggers to WARNING level
     logging.getLogger('uvicorn').setLevel(logging.INFO) # Uvicorn logs are useful
     logging.getLogger('fastapi').setLevel(logging.INFO)
     logging.getLogger('openai').setLevel(logging.WARNING)
     
+    _LOGGING_CONFIGURED = True
     logger.info("Logging configured successfully")
     return logger
 
+def stop_logging():
+    """
+    Stop the background file-logging thread, flushing queued records, and close the file handlers.
+    The queue handler is detached too, so nothing piles up in the queue afterwards and the next
+    setup_logging() call configures logging again.
+    """
+    global _LOGGING_CONFIGURED, _queue_listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger('nsclc_staging').removeHandler(_queue_handler)
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    _LOGGING_CONFIGURED = False
+    
+    if _queue_listener is None:
+        return
+    
+    _queue_listener.stop()
+    for handler in _queue_listener.handlers:
+        handler.close()
+    _queue_listener = None
+
 def get_logger(name: str = None):
     """
     Get a logger instance.
@@ -111,17 +159,16 @@ class LogExecutionTime:
         self.start_time = None
     
     def __enter__(self):
-        self.start_time = datetime.now()
-        self.logger.info(f"Starting {self.operation_name}")
+        self.start_time = time.perf_counter()
+        self.logger.info("Starting %s", self.operation_name)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        end_time = datetime.now()
-        duration = (end_time - self.start_time).total_seconds()
+        duration = time.perf_counter() - self.start_time
         
         if exc_type:
-            self.logger.error(f"{self.operation_name} failed after {duration:.2f}s: {exc_val}")
+            self.logger.error("%s failed after %.2fs: %s", self.operation_name, duration, exc_val)
         else:
-            self.logger.info(f"{self.operation_name} completed in {duration:.2f}s")
+            self.logger.info("%s completed in %.2fs", self.operation_name, duration)
         
         return False  # Don't suppress exceptions 
\ No newline at end of file